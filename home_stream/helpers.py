@@ -6,11 +6,12 @@
 
 from __future__ import annotations
 
+import copy
+import functools
 import hashlib
 import hmac
 import mimetypes
 import os
-import re
 import subprocess
 from urllib.parse import quote
 from xml.etree import ElementTree as ET
@@ -38,21 +39,34 @@ NFO_MAX_BYTES = 1024 * 1024
 # Fields extracted from .nfo files, in display order.
 NFO_FIELDS = ("title", "year", "rating", "plot")
 
+# Prefer the libyaml-backed loader (much faster), fall back to the pure-Python one.
+YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Keyed HMAC-SHA256 prototypes per secret. Copying one skips re-deriving the key pads.
+_HMAC_PROTOTYPES: dict[bytes, hmac.HMAC] = {}
+
+# Translation table deleting every ASCII character that is not allowed in a slug.
+_SLUG_SAFE_CHARS = frozenset("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_&-.")
+_SLUG_DELETE_TABLE = str.maketrans(
+    "", "", "".join(chr(c) for c in range(128) if chr(c) not in _SLUG_SAFE_CHARS)
+)
+
 
 def load_config(app: Flask, filename: str) -> None:
     """Load configuration from a YAML file."""
-    with open(filename, encoding="UTF-8") as f:
-        config = yaml.safe_load(f)
+    stat = os.stat(filename)
+    # Deep copy, as the config is modified below and its values end up in the Flask config
+    config = copy.deepcopy(_parse_yaml(filename, stat.st_mtime_ns, stat.st_size))
 
     # Check whether mandatory keys are filled
     for required_key in REQUIRED_CONFIG_KEYS:
         if required_key not in config:
             msg = f"Missing '{required_key}' key in config file."
             raise KeyError(msg)
-    # Combine video and audio extensions
-    config["media_extensions"] = config.get("video_extensions", []) + config.get(
-        "audio_extensions", []
-    )
+    # Normalize extensions into sets for fast lookups, and combine video and audio extensions
+    for ext_key in ("video_extensions", "audio_extensions"):
+        config[ext_key] = frozenset(str(ext).lower().lstrip(".") for ext in config[ext_key] or [])
+    config["media_extensions"] = config["video_extensions"] | config["audio_extensions"]
     # Add the config file content to the Flask app config
     for key, value in config.items():
         # Secret key as built-in Flask config and also as the stream secret
@@ -62,6 +76,14 @@ def load_config(app: Flask, filename: str) -> None:
         else:
             app.config[key.upper()] = value
 
+    # Pre-encode the bcrypt hashes once so password checks don't re-encode them per attempt
+    app.config["USERS_BYTES"] = {
+        user: pw_hash.encode("utf-8") for user, pw_hash in app.config["USERS"].items()
+    }
+
+    # Resolve the media root once; it is fixed for the lifetime of the app
+    app.config["MEDIA_ROOT_REAL"] = os.path.realpath(app.config["MEDIA_ROOT"])
+
     # Error when using default secret key
     if app.secret_key == "CHANGE_ME_IN_FAVOUR_OF_A_LONG_PASSWORD":  # noqa: S105
         msg = "You must change the default secret_key in the config file."
@@ -96,19 +118,19 @@ def load_config(app: Flask, filename: str) -> None:
     app.logger.debug(app.config)
 
 
-def secure_path(subpath: str) -> str:
-    """Secure and resolve a path inside the media root, including mounts or symlinks."""
-    media_root = os.path.abspath(current_app.config["MEDIA_ROOT"])
-    real_media_root = os.path.realpath(media_root)
+@functools.lru_cache(maxsize=8)
+def _parse_yaml(filename: str, mtime_ns: int, size: int) -> dict:  # noqa: ARG001 (cache key)
+    """Parse a YAML file, cached until its modification time or size changes."""
+    with open(filename, encoding="UTF-8") as f:
+        return yaml.load(f, Loader=YAML_LOADER)  # noqa: S506 (always a safe loader)
 
-    unsafe_path = os.path.normpath(os.path.join(media_root, subpath))
-    resolved_path = os.path.realpath(unsafe_path)
 
-    allowed_roots = [media_root, real_media_root]
+def secure_path(subpath: str) -> str:
+    """Secure and resolve a path inside the media root, including mounts or symlinks."""
+    real_media_root = current_app.config["MEDIA_ROOT_REAL"]
+    resolved_path = os.path.realpath(os.path.join(real_media_root, subpath))
 
-    if not any(
-        resolved_path == root or resolved_path.startswith(root + os.sep) for root in allowed_roots
-    ):
+    if resolved_path != real_media_root and not resolved_path.startswith(real_media_root + os.sep):
         current_app.logger.warning(
             "Blocked path traversal or symlink escape: %s → %s", subpath, resolved_path
         )
@@ -125,9 +147,7 @@ def file_type(filename: str) -> str:
 
 def verify_password(username: str, password: str) -> str | None:
     """Verify the provided username and password."""
-    if username in current_app.config["USERS"] and checkpw(
-        password.encode("utf-8"), current_app.config["USERS"].get(username).encode("utf-8")
-    ):
+    if _check_password(username, password):
         request.password = password  # ty: ignore[unresolved-attribute]
         return username
     return None
@@ -135,17 +155,20 @@ def verify_password(username: str, password: str) -> str | None:
 
 def validate_user(username: str, password: str) -> bool:
     """Used for session-based auth (login form)."""
-    if username in current_app.config["USERS"]:
-        return checkpw(
-            password.encode("utf-8"), current_app.config["USERS"][username].encode("utf-8")
-        )
-    return False
+    return _check_password(username, password)
+
+
+def _check_password(username: str, password: str) -> bool:
+    """Check a password against the user's pre-encoded bcrypt hash."""
+    stored = current_app.config["USERS_BYTES"].get(username)
+    return stored is not None and checkpw(password.encode("utf-8"), stored)
 
 
 def get_stream_token(username: str, chars: int = 16) -> str:
     """Generate a permanent token for streaming based on username, password hash, and secret key."""
-    secret = current_app.config["STREAM_SECRET"]
-    users = current_app.config.get("USERS", {})
+    cfg = current_app.config
+    secret = cfg["STREAM_SECRET"]
+    users = cfg.get("USERS", {})
 
     password_hash = users.get(username)
     if not password_hash:
@@ -153,13 +176,26 @@ def get_stream_token(username: str, chars: int = 16) -> str:
         raise ValueError(msg)
 
     token_input = f"{username}:{password_hash}"
-    return hmac.new(secret.encode(), token_input.encode(), hashlib.sha256).hexdigest()[:chars]
+    mac = _keyed_hmac(secret)
+    mac.update(token_input.encode())
+    return mac.hexdigest()[:chars]
 
 
 def compute_session_signature(username: str, password_hash: str, secret: str) -> str:
     """Compute a session signature based on username and password hash."""
     data = f"{username}:{password_hash}"
-    return hmac.new(secret.encode(), data.encode(), hashlib.sha256).hexdigest()
+    mac = _keyed_hmac(secret)
+    mac.update(data.encode())
+    return mac.hexdigest()
+
+
+def _keyed_hmac(secret: str) -> hmac.HMAC:
+    """Return a fresh HMAC-SHA256 object for the secret, cloned from a cached prototype."""
+    key = secret.encode()
+    prototype = _HMAC_PROTOTYPES.get(key)
+    if prototype is None:
+        prototype = _HMAC_PROTOTYPES[key] = hmac.new(key, digestmod=hashlib.sha256)
+    return prototype.copy()
 
 
 def truncate_secret(secret: str, chars: int = 8) -> str:
@@ -171,14 +207,17 @@ def truncate_secret(secret: str, chars: int = 8) -> str:
 
 def get_version_info() -> str:
     """Get the version information of the application."""
-    # Get short git commit hash if available
+    return f"{__version__} ({_git_commit()})"
+
+
+@functools.lru_cache(maxsize=1)
+def _git_commit() -> str:
+    """Get the short git commit hash, if available. Cached as it does not change at runtime."""
     try:
-        commit = subprocess.check_output(["git", "rev-parse", "--short", "HEAD"]).decode().strip()  # noqa: S607
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"]).decode().strip()  # noqa: S607
     except Exception:  # noqa: BLE001
         current_app.logger.debug("Failed to get git commit hash.", exc_info=True)
-        commit = "unknown commit"
-
-    return f"{__version__} ({commit})"
+        return "unknown commit"
 
 
 def sanitize_filename(name: str) -> str:
@@ -188,20 +227,41 @@ def sanitize_filename(name: str) -> str:
 
 def slugify(name: str) -> str:
     """Turn a filename into a URL-safe slug (preserving readability)."""
-    name = name.strip()
-    name = re.sub(r"[\s]+", "_", name)  # Replace spaces with underscores
-    return re.sub(r"[^a-zA-Z0-9_&\-\.]", "", name)  # Keep only safe characters
+    name = "_".join(name.split())  # Strip, and replace runs of whitespace with underscores
+    # Keep only safe characters: drop non-ASCII (incl. surrogates), then unsafe ASCII
+    return name.encode("ascii", "ignore").decode("ascii").translate(_SLUG_DELETE_TABLE)
 
 
 def deslugify(slug: str, directory: str) -> str:
     """Find real filename in a directory matching the slug."""
-    for fname in os.listdir(directory):
-        if slugify(fname) == slug:
-            return fname
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            if slugify(entry.name) == slug:
+                return entry.name
     msg = f"No match for slug '{slug}' in '{directory}'"
     raise FileNotFoundError(msg)
 
 
+def _entry_is_dir(entry: os.DirEntry[str]) -> bool:
+    """Check if a scandir entry is a directory, treating unresolvable entries as no directory.
+
+    Like os.path.isdir(), but unlike DirEntry.is_dir(), this returns False on any OSError, e.g.
+    for a looping symlink or a symlink into an unreadable directory.
+    """
+    try:
+        return entry.is_dir()
+    except OSError:
+        return False
+
+
+def _entry_is_file(entry: os.DirEntry[str]) -> bool:
+    """Check if a scandir entry is a regular file, treating unresolvable entries as no file."""
+    try:
+        return entry.is_file()
+    except OSError:
+        return False
+
+
 def resolve_real_path_from_slugs(slug_parts: list[str]) -> str:
     """
     Resolve a slugified URL path into the real filesystem path.
@@ -224,19 +284,18 @@ def resolve_real_path_from_slugs(slug_parts: list[str]) -> str:
     real_parts = []
 
     for idx, slug in enumerate(slug_parts):
-        entries = os.listdir(current_dir)
         is_last = idx == len(slug_parts) - 1  # Final path segment?
 
-        for entry in entries:
-            full_entry = os.path.join(current_dir, entry)
-
-            if slugify(entry) == slug and (is_last or os.path.isdir(full_entry)):
-                real_parts.append(entry)
-                current_dir = full_entry
-                break
-        else:
-            # No match found for this slug part → abort
-            abort(404)
+        # scandir yields entries with their type, so is_dir() needs no extra stat call
+        with os.scandir(current_dir) as entries:
+            for entry in entries:
+                if slugify(entry.name) == slug and (is_last or _entry_is_dir(entry)):
+                    real_parts.append(entry.name)
+                    current_dir = entry.path
+                    break
+            else:
+                # No match found for this slug part → abort
+                abort(404)
 
     return os.path.join(secure_path(""), *real_parts)
 
@@ -285,22 +344,34 @@ def list_folder_entries_with_stream_urls(
     folders: list[dict[str, str]] = []
     files: list[dict[str, object]] = []
 
-    # Loop through all entries in the directory
-    for dir_element in os.listdir(real_path):
-        full = os.path.join(real_path, dir_element)
+    # Look up per-request invariants once instead of for every entry
+    cfg = current_app.config
+    media_extensions = cfg["MEDIA_EXTENSIONS"]
+    audio_extensions = cfg["AUDIO_EXTENSIONS"]
+    show_metadata = cfg.get("SHOW_METADATA")
+    token = get_stream_token(username)
+
+    # Loop through all entries in the directory. scandir yields entries with their type, so
+    # the directory/file checks below need no extra stat call.
+    with os.scandir(real_path) as scanner:
+        dir_entries = list(scanner)
+
+    for dir_entry in dir_entries:
+        dir_element = dir_entry.name
+        full = dir_entry.path
         entry_slug = slugify(dir_element)
 
         # Check if entry is a directory and not hidden
-        if os.path.isdir(full) and not dir_element.startswith("."):
+        if _entry_is_dir(dir_entry) and not dir_element.startswith("."):
             folder_slug_path = "/".join([*slug_parts, entry_slug])
             folders.append({"name": sanitize_filename(dir_element), "slug_path": folder_slug_path})
 
         # Check if entry is a file with a valid media extension
-        elif os.path.isfile(full):
+        elif _entry_is_file(dir_entry):
             ext = os.path.splitext(dir_element)[1].lower().strip(".")
-            if ext in current_app.config["MEDIA_EXTENSIONS"]:
+            if ext in media_extensions:
                 file_slug_path = "/".join([*slug_parts, entry_slug])
-                stream_url = build_stream_url(username, get_stream_token(username), file_slug_path)
+                stream_url = build_stream_url(username, token, file_slug_path)
                 entry: dict[str, object] = {
                     "name": sanitize_filename(dir_element),
                     "slug_path": file_slug_path,
@@ -308,8 +379,8 @@ def list_folder_entries_with_stream_urls(
                 }
                 # one metadata read per media file per view; ceiling is O(files) filesystem
                 # operations on a folder render. Upgrade path: cache by path+mtime.
-                if current_app.config.get("SHOW_METADATA"):
-                    if ext in current_app.config["AUDIO_EXTENSIONS"]:
+                if show_metadata:
+                    if ext in audio_extensions:
                         metadata = read_audio_metadata(full)
                     else:
                         metadata = read_nfo_metadata(full)
@@ -425,7 +496,8 @@ def build_file_download_response(real_path: str) -> Response:
 
     Auth/path resolution must already have happened before calling this.
     """
-    method = current_app.config.get("DOWNLOAD_METHOD", "direct")
+    cfg = current_app.config
+    method = cfg.get("DOWNLOAD_METHOD", "direct")
     download_name = sanitize_filename(os.path.basename(real_path))
 
     if method == "direct":
@@ -440,12 +512,11 @@ def build_file_download_response(real_path: str) -> Response:
 
     if method == "xaccel":
         # nginx internal redirect. Value is an internal URI, not a filesystem path.
-        prefix = current_app.config["DOWNLOAD_INTERNAL_PREFIX"]
+        prefix = cfg["DOWNLOAD_INTERNAL_PREFIX"]
         # real_path is symlink-resolved (via secure_path/realpath), so compute the relative
         # path against the resolved media root too — otherwise a symlinked media_root would
         # produce a broken "../../.." URI instead of a clean relative path.
-        media_root = os.path.realpath(current_app.config["MEDIA_ROOT"])
-        rel_path = os.path.relpath(real_path, media_root)
+        rel_path = os.path.relpath(real_path, cfg["MEDIA_ROOT_REAL"])
         # Encode each path segment; keep "/" as separators.
         headers["X-Accel-Redirect"] = f"{prefix}/{quote(rel_path)}"
     else:  # xsendfile
@@ -4,17 +4,31 @@
 
 """Configuration for pytest fixtures."""
 
+import copy
 import os
 import shutil
+import sys
 import tempfile
-import uuid
+from pathlib import Path
 
 import bcrypt
 import pytest
 import yaml
 
-from home_stream.app import create_app
-from home_stream.helpers import compute_session_signature, get_stream_token, slugify
+# Don't write .pyc files for the project modules imported during the test run. This has to
+# happen before importing them; the tests package and this conftest are compiled before it runs.
+sys.dont_write_bytecode = True
+
+from home_stream.app import create_app  # noqa: E402
+from home_stream.helpers import (  # noqa: E402
+    compute_session_signature,
+    get_stream_token,
+    get_version_info,
+    slugify,
+)
+
+# Use the libyaml-backed dumper when available to speed up writing test configs.
+YAML_DUMPER = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
 
 MINIMAL_MP3 = bytes.fromhex(
     "494433030000000021764c414d4533322e39372e39000000"  # ID3 header for metadata
@@ -22,50 +36,116 @@ MINIMAL_MP3 = bytes.fromhex(
 )
 
 
-def create_temp_config(content: dict) -> str:
-    """Write a temporary YAML config file and return its path."""
-    with tempfile.NamedTemporaryFile("w+", delete=False) as f:
-        yaml.dump(content, f)
-        f.flush()
-        return f.name
+# Media file provided by the `media_file` fixture, relative to MEDIA_ROOT
+MEDIA_FILE_RELPATH = os.path.join("test", "with spaces", "sample testfile 12ab34cd.mp3")
+# Its slugified path as used in URLs, e.g. 'test/with_spaces/sample_testfile_12ab34cd.mp3'
+MEDIA_FILE_SLUG_PATH = "/".join(slugify(p) for p in MEDIA_FILE_RELPATH.split(os.sep))
 
 
-@pytest.fixture(name="temp_media_root")
-def fixture_temp_media_root():
-    """Create a temporary directory to act as media_root."""
-    tmp_dir = tempfile.mkdtemp(prefix="media_")
-    yield tmp_dir
-    shutil.rmtree(tmp_dir)
+def create_temp_config(content: dict, directory: Path) -> str:
+    """Write a YAML config file into the given (temporary) directory and return its path."""
+    config_path = directory / "config.yaml"
+    with open(config_path, "w", encoding="UTF-8") as f:
+        yaml.dump(content, f, Dumper=YAML_DUMPER)
+    return str(config_path)
 
 
-@pytest.fixture(name="config_file")
-def fixture_config_file(temp_media_root):
-    """Create a temporary config file for testing."""
-    hashed_pw = bcrypt.hashpw(b"test", bcrypt.gensalt()).decode()
+@pytest.fixture(name="wsgi_config", scope="session")
+def fixture_wsgi_config(tmp_path_factory):
+    """Write a minimal config file for loading the wsgi module once per session."""
     config = {
-        "users": {"testuser": hashed_pw},
+        "users": {"testuser": "fake"},
         "video_extensions": ["mp4"],
         "audio_extensions": ["mp3"],
-        "media_root": temp_media_root,
+        "media_root": "/tmp",
         "secret_key": "testsecret",
         "protocol": "http",
     }
-    path = create_temp_config(config)
-    yield path
-    os.remove(path)
+    return create_temp_config(config, tmp_path_factory.mktemp("wsgi"))
 
 
-@pytest.fixture(name="app")
-def fixture_app(config_file):
-    """Create a Flask app for testing."""
-    app = create_app(config_file, debug=True)
+@pytest.fixture(name="media_base", scope="session")
+def fixture_media_base():
+    """Provide a base directory for all media trees of the session, removed afterwards.
+
+    On Linux, it is placed on the RAM-backed /dev/shm, so writing and serving the media files
+    does not hit the disk.
+    """
+    shm = "/dev/shm"
+    base = tempfile.mkdtemp(
+        prefix="home-stream-tests-",
+        dir=shm if sys.platform == "linux" and os.path.isdir(shm) else None,
+    )
+    yield Path(base)
+    shutil.rmtree(base, ignore_errors=True)
+
+
+@pytest.fixture(name="app_template", scope="session")
+def fixture_app_template(tmp_path_factory, media_base):
+    """Create the Flask app and a template media tree once per test session.
+
+    Building the app (incl. hashing the test password) and writing the media files is the most
+    expensive part of the setup, so tests share it and get a fresh copy of the tree via `app`.
+    """
+    media_root = media_base / "template"
+    media_root.mkdir()
+
+    # Use bcrypt's minimum cost factor: every login POST in the tests verifies against this hash
+    hashed_pw = bcrypt.hashpw(b"test", bcrypt.gensalt(rounds=4)).decode()
+    config = {
+        "users": {"testuser": hashed_pw},
+        "video_extensions": ["mp4"],
+        "audio_extensions": ["mp3"],
+        "media_root": str(media_root),
+        "secret_key": "testsecret",
+        "protocol": "http",
+    }
+    config_path = create_temp_config(config, tmp_path_factory.mktemp("config"))
+
+    app = create_app(config_path, debug=True)
     app.config.update(
         {
             "TESTING": True,
             "WTF_CSRF_ENABLED": False,  # Disable CSRF in tests
         }
     )
-    return app
+
+    # Media file with spaces in filename and parent directories, a second file which isn't
+    # yielded by `media_file`, and a non-media file inside the same folder
+    folder = media_root / os.path.dirname(MEDIA_FILE_RELPATH)
+    folder.mkdir(parents=True)
+    (media_root / MEDIA_FILE_RELPATH).write_bytes(MINIMAL_MP3)
+    (folder / "secondary testfile 9f8e7d6c.mp3").write_bytes(MINIMAL_MP3)
+    (folder / "non_media_file.txt").write_text("This is not a media file.", encoding="UTF-8")
+    # Empty folders directly in the media root
+    (media_root / "subfolder").mkdir()
+    (media_root / "empty_folder").mkdir()
+
+    return app, str(media_root)
+
+
+@pytest.fixture(name="app")
+def fixture_app(app_template, media_base):
+    """Provide the Flask app, pointed at a fresh copy of the template media tree.
+
+    Config changes and rate limit counters from a test are reset afterwards, and the media tree
+    copy is removed, also for failed tests.
+    """
+    app, template_root = app_template
+    saved_config = copy.deepcopy(dict(app.config))
+
+    test_dir = tempfile.mkdtemp(dir=media_base)
+    media_root = shutil.copytree(template_root, os.path.join(test_dir, "media"))
+    app.config["MEDIA_ROOT"] = media_root
+    app.config["MEDIA_ROOT_REAL"] = os.path.realpath(media_root)
+    for limiter in app.extensions["limiter"]:
+        limiter.reset()
+
+    yield app
+
+    app.config.clear()
+    app.config.update(saved_config)
+    shutil.rmtree(test_dir, ignore_errors=True)
 
 
 @pytest.fixture(name="client")
@@ -74,52 +154,52 @@ def fixture_client(app):
     return app.test_client()
 
 
-def login_session(sess, app, username="testuser") -> None:
-    """Helper to simulate a logged-in user inside a test session."""
+@pytest.fixture(name="session_cookie", scope="session")
+def fixture_session_cookie(app_template):
+    """Sign a session cookie for a logged-in 'testuser' once per session."""
+    app, _ = app_template
     with app.app_context():
         users = app.config["USERS"]
         secret = app.config["STREAM_SECRET"]
+        serializer = app.session_interface.get_signing_serializer(app)
+        return serializer.dumps(
+            {
+                "username": "testuser",
+                "auth_signature": compute_session_signature("testuser", users["testuser"], secret),
+            }
+        )
+
 
-        sess["username"] = username
-        sess["auth_signature"] = compute_session_signature(username, users[username], secret)
+@pytest.fixture(name="logged_in_client")
+def fixture_logged_in_client(client, app, session_cookie):
+    """Create a test client with the session of a logged-in 'testuser'."""
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"], session_cookie)
+    return client
 
 
-@pytest.fixture(name="stream_token")
-def fixture_stream_token():
+@pytest.fixture(name="stream_token", scope="session")
+def fixture_stream_token(app_template):
     """Get the default stream token for 'testuser'."""
-    return get_stream_token("testuser")
+    app, _ = app_template
+    with app.app_context():
+        return get_stream_token("testuser")
+
+
+@pytest.fixture(name="version_info", scope="session")
+def fixture_version_info(app_template):
+    """Get the version info string shown in the footer once per session."""
+    app, _ = app_template
+    with app.app_context():
+        return get_version_info()
 
 
 @pytest.fixture(name="media_file")
 def fixture_media_file(app):
-    """Create a minimal valid MP3 file inside MEDIA_ROOT.
+    """Return the path of a minimal valid MP3 file inside MEDIA_ROOT.
 
     Uses spaces in filename and parent directories.
     """
-    # Create a temporary directory with spaces for the media file
-    media_root = app.config["MEDIA_ROOT"]
-    folder = os.path.join(media_root, "test", "with spaces")
-    os.makedirs(folder, exist_ok=True)
-
-    # Example: 'sample testfile 12ab34cd56ef.mp3'
-    filename = f"sample testfile {uuid.uuid4().hex[:8]}.mp3"
-    file_path = os.path.join(folder, filename)
-    with open(file_path, "wb") as f:
-        f.write(MINIMAL_MP3)
-
-    # Create a second file which isn't yielded
-    secondary_filename = f"secondary testfile {uuid.uuid4().hex[:8]}.mp3"
-    secondary_file_path = os.path.join(folder, secondary_filename)
-    with open(secondary_file_path, "wb") as f:
-        f.write(MINIMAL_MP3)
-
-    # Also create a non-media file inside the same folder
-    non_media_file = os.path.join(folder, "non_media_file.txt")
-    with open(non_media_file, "w", encoding="UTF-8") as f:
-        f.write("This is not a media file.")
-
-    yield file_path
-    os.remove(file_path)
+    return os.path.join(app.config["MEDIA_ROOT"], MEDIA_FILE_RELPATH)
 
 
 @pytest.fixture(name="media_file_nonascii")
@@ -149,13 +229,10 @@ def fixture_media_file_nonascii_slugs(media_file_nonascii, app):
     return os.path.basename(media_file_nonascii), "/".join(slugified_parts)
 
 
-@pytest.fixture(name="media_file_slugs")
-def fixture_media_file_slugs(media_file, app):
+@pytest.fixture(name="media_file_slugs", scope="session")
+def fixture_media_file_slugs():
     """Return both real filename and full slugified path including folders.
 
-    Ex. Return: ('sample testfile 78d9f5a2.mp3', 'test/with_spaces/sample_testfile_78d9f5a2.mp3')
+    Ex. Return: ('sample testfile 12ab34cd.mp3', 'test/with_spaces/sample_testfile_12ab34cd.mp3')
     """
-    rel_path = os.path.relpath(media_file, app.config["MEDIA_ROOT"])
-    parts = rel_path.split(os.sep)
-    slugified_parts = [slugify(p) for p in parts]
-    return os.path.basename(media_file), "/".join(slugified_parts)
+    return os.path.basename(MEDIA_FILE_RELPATH), MEDIA_FILE_SLUG_PATH
@@ -13,6 +13,7 @@ from flask import Flask, current_app, request
 from home_stream.helpers import (
     REQUIRED_CONFIG_KEYS,
     _format_duration,
+    _git_commit,
     build_file_download_response,
     compute_session_signature,
     deslugify,
@@ -76,6 +77,17 @@ def test_secure_path_blocks_traversal(app) -> None:
         assert "403" in str(excinfo.value)
 
 
+def test_secure_path_blocks_symlink_escape(app, tmp_path) -> None:
+    """Ensure secure_path blocks symlinks inside the media root that point outside of it."""
+    with app.app_context():
+        media_root = current_app.config["MEDIA_ROOT"]
+        os.symlink(tmp_path, os.path.join(media_root, "escape"))
+
+        with pytest.raises(Exception) as excinfo:
+            secure_path("escape/secret.txt")
+        assert "403" in str(excinfo.value)
+
+
 def test_validate_user_success(app) -> None:
     """Return True if username and password match config."""
     with app.app_context():
@@ -105,7 +117,7 @@ def test_get_stream_token_missing_secret(app) -> None:
             get_stream_token("testuser")
 
 
-def test_load_config_raises_if_default_secret_used() -> None:
+def test_load_config_raises_if_default_secret_used(tmp_path) -> None:
     """Raise ValueError if secret_key is left as the insecure default."""
     config = {
         "users": {"testuser": "fake"},
@@ -116,17 +128,14 @@ def test_load_config_raises_if_default_secret_used() -> None:
         "protocol": "http",
     }
 
-    path = create_temp_config(config)
-    try:
-        app = Flask("test")
-        with pytest.raises(ValueError, match="default secret_key"):
-            load_config(app, path)
-    finally:
-        os.remove(path)
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    with pytest.raises(ValueError, match="default secret_key"):
+        load_config(app, path)
 
 
 @pytest.mark.parametrize("missing_key", REQUIRED_CONFIG_KEYS)
-def test_load_config_raises_when_key_is_missing(missing_key) -> None:
+def test_load_config_raises_when_key_is_missing(missing_key, tmp_path) -> None:
     """Raise KeyError if any required config key is missing."""
     # Start with a valid config
     config = {
@@ -140,13 +149,10 @@ def test_load_config_raises_when_key_is_missing(missing_key) -> None:
 
     config.pop(missing_key)
 
-    path = create_temp_config(config)
-    try:
-        app = Flask("test")
-        with pytest.raises(KeyError, match=f"Missing '{missing_key}'"):
-            load_config(app, path)
-    finally:
-        os.remove(path)
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    with pytest.raises(KeyError, match=f"Missing '{missing_key}'"):
+        load_config(app, path)
 
 
 def test_load_config_successfully_sets_flask_config(app) -> None:
@@ -155,7 +161,13 @@ def test_load_config_successfully_sets_flask_config(app) -> None:
         assert current_app.secret_key == "testsecret"
         assert current_app.secret_key == current_app.config["SECRET_KEY"]
         assert current_app.config["STREAM_SECRET"] == current_app.secret_key
-        assert current_app.config["MEDIA_EXTENSIONS"] == ["mp4", "mp3"]
+        assert current_app.config["MEDIA_EXTENSIONS"] == frozenset({"mp4", "mp3"})
+        assert current_app.config["MEDIA_ROOT_REAL"] == os.path.realpath(
+            current_app.config["MEDIA_ROOT"]
+        )
+        assert current_app.config["USERS_BYTES"] == {
+            "testuser": current_app.config["USERS"]["testuser"].encode("utf-8")
+        }
 
 
 def _base_config() -> dict:
@@ -170,56 +182,80 @@ def _base_config() -> dict:
     }
 
 
-def test_load_config_download_method_defaults() -> None:
+def test_load_config_download_method_defaults(tmp_path) -> None:
     """download_method defaults to 'direct' and prefix to '/_protected'."""
-    path = create_temp_config(_base_config())
-    try:
-        app = Flask("test")
-        load_config(app, path)
-        assert app.config["DOWNLOAD_METHOD"] == "direct"
-        assert app.config["DOWNLOAD_INTERNAL_PREFIX"] == "/_protected"
-    finally:
-        os.remove(path)
+    path = create_temp_config(_base_config(), tmp_path)
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["DOWNLOAD_METHOD"] == "direct"
+    assert app.config["DOWNLOAD_INTERNAL_PREFIX"] == "/_protected"
+
+
+def test_load_config_reloads_changed_file(tmp_path) -> None:
+    """A cached config is not reused once the file changes, nor shared between apps."""
+    path = create_temp_config(_base_config(), tmp_path)
+    app = Flask("test")
+    load_config(app, path)
+    app.config["USERS"]["testuser"] = "mutated"
+
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["USERS"]["testuser"] == "fake"
+
+    config = _base_config()
+    config["protocol"] = "https"
+    path = create_temp_config(config, tmp_path)  # overwrites the same file
+    # Force a different mtime, independent of filesystem timestamp granularity
+    mtime_ns = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["PROTOCOL"] == "https"
+
+
+def test_load_config_normalizes_extensions(tmp_path) -> None:
+    """Extensions are lowercased, stripped of a leading dot and stored as frozensets."""
+    config = _base_config()
+    config["video_extensions"] = ["MP4", ".mkv"]
+    config["audio_extensions"] = [".Mp3"]
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["VIDEO_EXTENSIONS"] == frozenset({"mp4", "mkv"})
+    assert app.config["AUDIO_EXTENSIONS"] == frozenset({"mp3"})
+    assert app.config["MEDIA_EXTENSIONS"] == frozenset({"mp4", "mkv", "mp3"})
 
 
 @pytest.mark.parametrize("method", ["direct", "xaccel", "xsendfile", "XAccel"])
-def test_load_config_download_method_valid(method) -> None:
+def test_load_config_download_method_valid(method, tmp_path) -> None:
     """Valid download_method values are accepted and normalized to lowercase."""
     config = _base_config()
     config["download_method"] = method
-    path = create_temp_config(config)
-    try:
-        app = Flask("test")
-        load_config(app, path)
-        assert app.config["DOWNLOAD_METHOD"] == method.lower()
-    finally:
-        os.remove(path)
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["DOWNLOAD_METHOD"] == method.lower()
 
 
-def test_load_config_download_method_invalid() -> None:
+def test_load_config_download_method_invalid(tmp_path) -> None:
     """An invalid download_method raises a helpful ValueError."""
     config = _base_config()
     config["download_method"] = "ftp"
-    path = create_temp_config(config)
-    try:
-        app = Flask("test")
-        with pytest.raises(ValueError, match="Invalid download_method"):
-            load_config(app, path)
-    finally:
-        os.remove(path)
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    with pytest.raises(ValueError, match="Invalid download_method"):
+        load_config(app, path)
 
 
-def test_load_config_download_internal_prefix_trailing_slash() -> None:
+def test_load_config_download_internal_prefix_trailing_slash(tmp_path) -> None:
     """A trailing slash on download_internal_prefix is stripped."""
     config = _base_config()
     config["download_internal_prefix"] = "/secure/"
-    path = create_temp_config(config)
-    try:
-        app = Flask("test")
-        load_config(app, path)
-        assert app.config["DOWNLOAD_INTERNAL_PREFIX"] == "/secure"
-    finally:
-        os.remove(path)
+    path = create_temp_config(config, tmp_path)
+    app = Flask("test")
+    load_config(app, path)
+    assert app.config["DOWNLOAD_INTERNAL_PREFIX"] == "/secure"
 
 
 def test_build_file_download_response_direct(app, media_file) -> None:
@@ -277,6 +313,7 @@ def test_build_file_download_response_xaccel_symlinked_root(app, tmp_path) -> No
         app.config["DOWNLOAD_METHOD"] = "xaccel"
         app.config["DOWNLOAD_INTERNAL_PREFIX"] = "/_protected"
         app.config["MEDIA_ROOT"] = str(link_dir)  # configured as the symlink
+        app.config["MEDIA_ROOT_REAL"] = os.path.realpath(link_dir)  # as load_config resolves it
         # real_path is resolved, as the route would pass it
         real_path = os.path.realpath(str(media_file))
         response = build_file_download_response(real_path)
@@ -284,9 +321,9 @@ def test_build_file_download_response_xaccel_symlinked_root(app, tmp_path) -> No
         assert response.headers["X-Accel-Redirect"] == "/_protected/Filme/movie.mp4"
 
 
-def test_verify_password_success(app, client) -> None:
+def test_verify_password_success(app) -> None:
     """verify_password should return the username if password matches."""
-    with app.app_context(), client:
+    with app.test_request_context():
         result = verify_password("testuser", "test")
         assert result == "testuser"
         assert hasattr(request, "password")
@@ -310,7 +347,15 @@ def test_get_version_info() -> None:
     )
 
 
-def test_get_version_info_git_failure(app, monkeypatch) -> None:
+@pytest.fixture(name="uncached_git_commit")
+def fixture_uncached_git_commit():
+    """Clear the cached git commit hash before and after the test, even if it fails."""
+    _git_commit.cache_clear()
+    yield
+    _git_commit.cache_clear()
+
+
+def test_get_version_info_git_failure(app, monkeypatch, uncached_git_commit) -> None:
     """Test that get_version_info handles git failure gracefully."""
     # Simulate subprocess raising an exception
     monkeypatch.setattr(
@@ -326,6 +371,38 @@ def test_get_version_info_git_failure(app, monkeypatch) -> None:
     )
 
 
+def test_get_version_info_runs_git_once(monkeypatch, uncached_git_commit) -> None:
+    """The git commit hash is looked up once and then served from cache."""
+    calls = []
+
+    def fake_check_output(cmd) -> bytes:
+        calls.append(cmd)
+        return b"abc1234\n"
+
+    monkeypatch.setattr("subprocess.check_output", fake_check_output)
+
+    assert get_version_info().endswith("(abc1234)")
+    assert get_version_info().endswith("(abc1234)")
+    assert len(calls) == 1
+
+
+@pytest.mark.parametrize(
+    ("name", "expected"),
+    [
+        ("My Test File.mp3", "My_Test_File.mp3"),
+        ("  padded \t name  ", "padded_name"),
+        ("multi   space\n\nname", "multi_space_name"),
+        ("Tom & Jerry (1940).mkv", "Tom_&_Jerry_1940.mkv"),
+        ("The Movie \u2013 Part 2.mkv", "The_Movie__Part_2.mkv"),
+        ("file\udc96name.mp4", "filename.mp4"),
+        ("a/b\\c:d*e?f.mp3", "abcdef.mp3"),
+    ],
+)
+def test_slugify(name, expected) -> None:
+    """Whitespace runs become underscores and only URL-safe ASCII characters are kept."""
+    assert slugify(name) == expected
+
+
 def test_deslugify_success(tmp_path) -> None:
     """Deslugify should find and return the matching real filename."""
     # Create a file with spaces
@@ -405,6 +482,15 @@ def test_compute_session_signature_changes_on_password_change() -> None:
     assert sig_old != sig_new, "Session signature did not change after password update"
 
 
+def test_compute_session_signature_changes_on_secret_change() -> None:
+    """Ensure signatures computed with different secrets do not share cached HMAC state."""
+    sig_a = compute_session_signature("testuser", "some_hash", "secret_a")
+    sig_b = compute_session_signature("testuser", "some_hash", "secret_b")
+
+    assert sig_a != sig_b, "Session signature did not change with the secret"
+    assert sig_a == compute_session_signature("testuser", "some_hash", "secret_a")
+
+
 def test_compute_session_signature_consistency() -> None:
     """Ensure the same inputs produce the same session signature."""
     username = "testuser"
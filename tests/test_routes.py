@@ -6,7 +6,9 @@
 
 import os
 
-from tests.conftest import login_session
+import pytest
+
+from tests.conftest import MEDIA_FILE_SLUG_PATH
 
 
 def test_login_page_loads(client) -> None:
@@ -19,15 +21,23 @@ def test_login_page_loads(client) -> None:
 def test_login_logout_flow(client) -> None:
     """Test the login and logout flow."""
     # Login with correct credentials
-    response = client.post(
-        "/login", data={"username": "testuser", "password": "test"}, follow_redirects=True
-    )
+    response = client.post("/login", data={"username": "testuser", "password": "test"})
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/"
+
+    response = client.get("/browse/")
     assert response.status_code == 200
     assert b"Overview" in response.data
 
     # Logout
-    response = client.get("/logout", follow_redirects=True)
-    assert b"Login" in response.data
+    response = client.get("/logout")
+    assert response.status_code == 302
+    assert response.headers["Location"] == "/login"
+
+    # The session is gone, so browsing redirects to the login page again
+    response = client.get("/browse/")
+    assert response.status_code == 302
+    assert "/login" in response.headers["Location"]
 
 
 def test_login_with_invalid_credentials(client) -> None:
@@ -41,19 +51,19 @@ def test_login_with_invalid_credentials(client) -> None:
 
 def test_login_rate_limit(client) -> None:
     """Trigger rate limiting on /login by making too many requests."""
-    for _ in range(3):
+    # Stop as soon as the limiter kicks in, independent of the configured limit
+    for _ in range(10):
         response = client.post("/login", data={"username": "testuser", "password": "wrong"})
+        if response.status_code == 429:
+            break
 
     assert response.status_code == 429
     assert b"Too many login attempts" in response.data
 
 
-def test_index_redirects_to_browse_when_logged_in(client, app) -> None:
+def test_index_redirects_to_browse_when_logged_in(logged_in_client) -> None:
     """Ensure / redirects to /browse/ for logged-in users."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/", follow_redirects=False)
+    response = logged_in_client.get("/", follow_redirects=False)
     assert response.status_code == 302
     assert response.headers["Location"].endswith("/browse/")
 
@@ -65,92 +75,91 @@ def test_index_redirects_when_not_logged_in(client) -> None:
     assert "/login" in response.headers["Location"]
 
 
-def test_404_on_invalid_browse_path(client, app) -> None:
+def test_404_on_invalid_browse_path(logged_in_client) -> None:
     """Test that a 404 error is returned for an invalid browse path."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/non_existent_folder")
+    response = logged_in_client.get("/browse/non_existent_folder")
     assert response.status_code == 404
 
 
-def test_browse_root_shows_page(client, app, media_file) -> None:
+def test_browse_root_shows_page(logged_in_client, media_file) -> None:
     """Access the root browse page when authenticated."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/")
+    response = logged_in_client.get("/browse/")
     assert response.status_code == 200
     assert b"Folders" in response.data or b"Media Files" in response.data
 
 
-def test_browse_existing_subdir(client, app) -> None:
-    """Create a subfolder and confirm it shows up in browse view."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    media_root = app.config["MEDIA_ROOT"]
-    subdir = os.path.join(media_root, "subfolder")
-    os.makedirs(subdir, exist_ok=True)
-
-    response = client.get("/browse/subfolder")
+def test_browse_existing_subdir(logged_in_client) -> None:
+    """Confirm an existing subfolder shows up in browse view."""
+    response = logged_in_client.get("/browse/subfolder")
     assert response.status_code == 200
     assert b"subfolder" in response.data
 
 
-def test_play_route_works(client, app, media_file_slugs) -> None:
+@pytest.mark.parametrize(
+    ("url", "status"),
+    [
+        ("/browse/Music", 200),
+        ("/play/Music", 200),
+        ("/dl-token/testuser/{token}/Music", 200),
+        # A looping symlink is neither a directory nor a file, so it cannot be traversed
+        ("/browse/Music/loop/song.mp3", 404),
+    ],
+)
+def test_folder_with_looping_symlink(logged_in_client, app, stream_token, url, status) -> None:
+    """Ensure an unresolvable symlink in a folder is skipped instead of causing an error."""
+    folder = os.path.join(app.config["MEDIA_ROOT"], "Music")
+    os.makedirs(folder)
+    with open(os.path.join(folder, "song.mp3"), "wb") as f:
+        f.write(b"ID3")
+    os.symlink("loop", os.path.join(folder, "loop"))
+
+    response = logged_in_client.get(url.format(token=stream_token))
+    assert response.status_code == status
+
+
+def test_play_route_works(logged_in_client, media_file_slugs) -> None:
     """Test that the /play/<filepath> route renders successfully when logged in."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
 
-    response = client.get(f"/play/{slugified_filename}")
+    response = logged_in_client.get(f"/play/{slugified_filename}")
     assert response.status_code == 200
     assert b"Player" in response.data
 
 
-def test_dl_token_for_invalid_token_returns_403(client, app) -> None:
+def test_dl_token_for_invalid_token_returns_403(logged_in_client) -> None:
     """Ensure /dl-token route returns 403 for invalid tokens."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/dl-token/testuser/badtoken/somefile.mp3")
+    response = logged_in_client.get("/dl-token/testuser/badtoken/somefile.mp3")
     assert response.status_code == 403
 
 
-def test_dl_token_valid_file_served(client, app, media_file_slugs, stream_token) -> None:
-    """Ensure /dl-token with valid token returns a real MP3 file."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-    url = f"/dl-token/testuser/{stream_token}/{slugified_filename}"
-
-    response = client.get(url)
-
-    assert response.status_code == 200
-    assert response.data.startswith(b"ID3")
-
+@pytest.mark.parametrize(
+    ("subpath", "status", "prefix", "absent"),
+    [
+        (MEDIA_FILE_SLUG_PATH, 206, b"ID3", None),
+        ("ghost.mp3", 404, None, None),
+        # Playlists of empty folders only contain the header
+        ("empty_folder", 200, b"#EXTM3U", b"#EXTINF"),
+        ("nonexistent_folder", 404, None, None),
+    ],
+)
+def test_dl_token_variants(logged_in_client, stream_token, subpath, status, prefix, absent) -> None:
+    """Ensure /dl-token with a valid token serves files and folders, and 404s on missing ones."""
+    url = f"/dl-token/testuser/{stream_token}/{subpath}"
 
-def test_dl_token_valid_but_file_missing(client, app, stream_token) -> None:
-    """Return 404 if file is missing even with valid token."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
+    # Files are served with range support, so only request the bytes needed to identify them
+    response = logged_in_client.get(url, headers={"Range": "bytes=0-2"})
 
-    filename = "ghost.mp3"
-    url = f"/dl-token/testuser/{stream_token}/{filename}"
-    response = client.get(url)
-    assert response.status_code == 404
+    assert response.status_code == status
+    if prefix is not None:
+        assert response.data.startswith(prefix)
+    if absent is not None:
+        assert absent not in response.data
 
 
-def test_dl_token_playlist_m3u8_response(client, app, stream_token, media_file_slugs) -> None:
+def test_dl_token_playlist_m3u8_response(logged_in_client, stream_token, media_file_slugs) -> None:
     """Ensure .m3u8 playlist is returned for a folder with valid token."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     url = f"/dl-token/testuser/{stream_token}/test/with_spaces"
-    response = client.get(url)
+    response = logged_in_client.get(url)
 
     _, media_file_slug = media_file_slugs
     expected_stream_url = f"http://localhost/dl-token/testuser/{stream_token}/{media_file_slug}"
@@ -166,77 +175,39 @@ def test_dl_token_playlist_m3u8_response(client, app, stream_token, media_file_s
     assert b"secondary_testfile" in response.data
 
 
-def test_dl_token_playlist_empty_folder(client, app, stream_token) -> None:
-    """Ensure an empty folder returns a minimal .m3u8 playlist."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    empty_path = os.path.join(app.config["MEDIA_ROOT"], "empty_folder")
-    os.makedirs(empty_path, exist_ok=True)
-
-    url = f"/dl-token/testuser/{stream_token}/empty_folder"
-    response = client.get(url)
-
-    assert response.status_code == 200
-    assert b"#EXTM3U" in response.data
-    assert b"#EXTINF" not in response.data
-
-
-def test_dl_token_playlist_invalid_path(client, app, stream_token) -> None:
-    """Ensure a 404 is returned for an invalid folder path."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    url = f"/dl-token/testuser/{stream_token}/nonexistent_folder"
-    response = client.get(url)
-    assert response.status_code == 404
-
-
 # --- Non-ASCII filename route tests ---
 # These test real-world filenames with characters like en-dashes and parentheses
 # that previously caused UnicodeEncodeError in the Docker container.
 
 
-def test_browse_nonascii_folder(client, app, media_file_nonascii) -> None:
+def test_browse_nonascii_folder(logged_in_client, media_file_nonascii) -> None:
     """Browse a folder whose name contains non-ASCII characters (en-dash)."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/Filme/The_Movie__Part_II")
+    response = logged_in_client.get("/browse/Filme/The_Movie__Part_II")
     assert response.status_code == 200
     assert "Part 2" in response.data.decode("utf-8")
 
 
-def test_play_nonascii_file(client, app, media_file_nonascii_slugs) -> None:
+def test_play_nonascii_file(logged_in_client, media_file_nonascii_slugs) -> None:
     """Play route works for files with non-ASCII characters in the name."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_path = media_file_nonascii_slugs
-    response = client.get(f"/play/{slugified_path}")
+    response = logged_in_client.get(f"/play/{slugified_path}")
     assert response.status_code == 200
     assert b"Player" in response.data
 
 
-def test_dl_token_nonascii_file(client, app, media_file_nonascii_slugs, stream_token) -> None:
+def test_dl_token_nonascii_file(logged_in_client, media_file_nonascii_slugs, stream_token) -> None:
     """dl-token route serves files with non-ASCII characters without crashing."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_path = media_file_nonascii_slugs
     url = f"/dl-token/testuser/{stream_token}/{slugified_path}"
-    response = client.get(url)
+    response = logged_in_client.get(url)
 
     assert response.status_code == 200
 
 
-def test_dl_token_nonascii_playlist(client, app, media_file_nonascii, stream_token) -> None:
+def test_dl_token_nonascii_playlist(logged_in_client, media_file_nonascii, stream_token) -> None:
     """dl-token route returns a playlist for a non-ASCII folder without crashing."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     url = f"/dl-token/testuser/{stream_token}/Filme/The_Movie__Part_II"
-    response = client.get(url)
+    response = logged_in_client.get(url)
 
     assert response.status_code == 200
     assert response.mimetype == "audio/mpegurl"
@@ -246,16 +217,13 @@ def test_dl_token_nonascii_playlist(client, app, media_file_nonascii, stream_tok
 # --- Download offloading (X-Accel-Redirect / X-Sendfile) route tests ---
 
 
-def test_dl_token_xaccel_file(client, app, media_file_slugs, stream_token) -> None:
+def test_dl_token_xaccel_file(logged_in_client, app, media_file_slugs, stream_token) -> None:
     """Xaccel mode emits X-Accel-Redirect with an empty body and keeps auth."""
     app.config["DOWNLOAD_METHOD"] = "xaccel"
     app.config["DOWNLOAD_INTERNAL_PREFIX"] = "/_protected"
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
-    response = client.get(f"/dl-token/testuser/{stream_token}/{slugified_filename}")
+    response = logged_in_client.get(f"/dl-token/testuser/{stream_token}/{slugified_filename}")
 
     assert response.status_code == 200
     assert response.data == b""  # webserver serves the bytes, not Flask
@@ -267,29 +235,25 @@ def test_dl_token_xaccel_file(client, app, media_file_slugs, stream_token) -> No
     assert "attachment" in response.headers["Content-Disposition"]
 
 
-def test_dl_token_xaccel_invalid_token(client, app, media_file_slugs) -> None:
+def test_dl_token_xaccel_invalid_token(logged_in_client, app, media_file_slugs) -> None:
     """Auth still enforced in xaccel mode: bad token returns 403, no header."""
     app.config["DOWNLOAD_METHOD"] = "xaccel"
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
-    response = client.get(f"/dl-token/testuser/badtoken/{slugified_filename}")
+    response = logged_in_client.get(f"/dl-token/testuser/badtoken/{slugified_filename}")
 
     assert response.status_code == 403
     assert "X-Accel-Redirect" not in response.headers
 
 
-def test_dl_token_xsendfile_file(client, app, media_file, media_file_slugs, stream_token) -> None:
+def test_dl_token_xsendfile_file(
+    logged_in_client, app, media_file, media_file_slugs, stream_token
+) -> None:
     """Xsendfile mode emits X-Sendfile with the absolute path and empty body."""
     app.config["DOWNLOAD_METHOD"] = "xsendfile"
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
-    response = client.get(f"/dl-token/testuser/{stream_token}/{slugified_filename}")
+    response = logged_in_client.get(f"/dl-token/testuser/{stream_token}/{slugified_filename}")
 
     assert response.status_code == 200
     assert response.data == b""
@@ -297,14 +261,13 @@ def test_dl_token_xsendfile_file(client, app, media_file, media_file_slugs, stre
     assert response.headers["X-Sendfile"] == os.path.realpath(media_file)
 
 
-def test_dl_token_offload_playlist_direct(client, app, stream_token, media_file_slugs) -> None:
+def test_dl_token_offload_playlist_direct(
+    logged_in_client, app, stream_token, media_file_slugs
+) -> None:
     """Folder playlists are always served directly, even with offloading enabled."""
     app.config["DOWNLOAD_METHOD"] = "xaccel"
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get(f"/dl-token/testuser/{stream_token}/test/with_spaces")
+    response = logged_in_client.get(f"/dl-token/testuser/{stream_token}/test/with_spaces")
 
     assert response.status_code == 200
     assert response.mimetype == "audio/mpegurl"
@@ -8,171 +8,151 @@ import re
 from os.path import dirname
 from urllib.parse import unquote
 
-from bs4 import BeautifulSoup
+import pytest
+from bs4 import BeautifulSoup, SoupStrainer
+from lxml import etree, html
 
-from home_stream.helpers import get_version_info
-from tests.conftest import login_session
+# Keep these tests on one xdist worker, so the module-scoped pages are rendered only once
+pytestmark = pytest.mark.xdist_group("templates")
 
+COPY_TO_CLIPBOARD_RE = re.compile(r"copyToClipboard\('([^']+)'")
+# Checking for the logout form is a single lookup, so query lxml's tree directly
+LOGOUT_FORM_XPATH = etree.XPath('//form[@action="/logout"]')
 
-def test_login_form_has_fields(client) -> None:
+
+@pytest.fixture(name="module_client", scope="module")
+def fixture_module_client(app_template, session_cookie):
+    """Create a logged-in test client on the unmodified template media tree.
+
+    Pages requested through it are deterministic, so they are rendered and parsed once per module.
+    """
+    app, _ = app_template
+    client = app.test_client()
+    client.set_cookie(app.config["SESSION_COOKIE_NAME"], session_cookie)
+    return client
+
+
+@pytest.fixture(name="play_page_soup", scope="module")
+def fixture_play_page_soup(module_client, media_file_slugs):
+    """Return the response and parsed HTML of /play/<file> for the media file."""
+    _, slugified_filename = media_file_slugs
+    response = module_client.get(f"/play/{slugified_filename}")
+    return response, BeautifulSoup(response.data, "lxml")
+
+
+@pytest.fixture(name="play_stream_url", scope="module")
+def fixture_play_stream_url(play_page_soup):
+    """Return the unquoted stream URL of the <source> tag on /play/<file>."""
+    _, soup = play_page_soup
+    source_tag = soup.find("source")
+    assert source_tag is not None
+    return unquote(source_tag["src"])
+
+
+@pytest.fixture(name="browse_page_soup", scope="module")
+def fixture_browse_page_soup(module_client):
+    """Return the response and parsed HTML of /browse/test/with_spaces/."""
+    response = module_client.get("/browse/test/with_spaces/")
+    return response, BeautifulSoup(response.data, "lxml")
+
+
+def test_login_form_has_fields(app) -> None:
     """Ensure the login page renders a form with username and password fields."""
-    response = client.get("/login")
-    soup = BeautifulSoup(response.data, "html.parser")
+    # Only the rendered template matters here, so call the view without the WSGI round-trip
+    with app.test_request_context("/login"):
+        page = app.view_functions["login"]()
+    soup = BeautifulSoup(page, "lxml", parse_only=SoupStrainer("form"))
     form = soup.find("form")
     assert form is not None
     assert form.find("input", {"name": "username"})
     assert form.find("input", {"name": "password"})
 
 
-def test_browse_page_shows_file_actions(client, app, media_file) -> None:
+def test_browse_page_shows_file_actions(browse_page_soup) -> None:
     """Ensure browse.html shows download, play, and copy buttons for media files."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
-    buttons = soup.find_all("button")
-    labels = [btn.get_text(strip=True) for btn in buttons]
+    _, soup = browse_page_soup
 
-    assert any("Download" in label for label in labels)
-    assert any("Play" in label for label in labels)
-    assert any("Copy Stream URL" in label for label in labels)
+    assert soup.select_one("button:-soup-contains('Download')")
+    assert soup.select_one("button:-soup-contains('Play')")
+    assert soup.select_one("button:-soup-contains('Copy Stream URL')")
 
 
-def test_play_page_embeds_media(client, app, media_file_slugs) -> None:
+def test_play_page_embeds_media(play_page_soup) -> None:
     """Ensure /play/<file> renders the correct media tag."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-
-    response = client.get(f"/play/{slugified_filename}")
-    soup = BeautifulSoup(response.data, "html.parser")
+    _, soup = play_page_soup
     assert soup.find("audio") or soup.find("video")
 
 
-def test_logout_button_shown_when_logged_in(client, app) -> None:
+def test_logout_button_shown_when_logged_in(logged_in_client) -> None:
     """Logout button should be visible when user is authenticated."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/", follow_redirects=True)
-    soup = BeautifulSoup(response.data, "html.parser")
-    logout_form = soup.find("form", {"action": "/logout"})
-    assert logout_form is not None
-    assert "Logout" in logout_form.text
+    response = logged_in_client.get("/browse/")
+    logout_forms = LOGOUT_FORM_XPATH(html.fromstring(response.data))
+    assert logout_forms
+    assert "Logout" in logout_forms[0].text_content()
 
 
 def test_logout_button_hidden_when_not_logged_in(client) -> None:
     """Logout button should not be present when not authenticated."""
     response = client.get("/login")
-    soup = BeautifulSoup(response.data, "html.parser")
-    logout_form = soup.find("form", {"action": "/logout"})
-    assert logout_form is None
+    assert not LOGOUT_FORM_XPATH(html.fromstring(response.data))
 
 
-def test_play_page_has_correct_stream_url(client, app, media_file_slugs, stream_token) -> None:
+def test_play_page_has_correct_stream_url(play_stream_url, stream_token) -> None:
     """Ensure /play/<file> embeds the correct dl-token stream URL."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-
-    response = client.get(f"/play/{slugified_filename}")
-    soup = BeautifulSoup(response.data, "html.parser")
-    source_tag = soup.find("source")
-    assert source_tag is not None
-
-    stream_url = unquote(source_tag["src"])
+    assert play_stream_url.startswith(f"http://localhost/dl-token/testuser/{stream_token}/")
 
-    assert stream_url.startswith(f"http://localhost/dl-token/testuser/{stream_token}/")
 
-
-def test_play_page_stream_url_works(client, app, media_file_slugs, stream_token) -> None:
+def test_play_page_stream_url_works(logged_in_client, play_stream_url, stream_token) -> None:
     """Ensure the stream URL embedded in /play works when fetched."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-
-    # Load the play page
-    response = client.get(f"/play/{slugified_filename}")
-    assert response.status_code == 200
-
-    soup = BeautifulSoup(response.data, "html.parser")
-    source_tag = soup.find("source")
-    assert source_tag is not None
+    assert stream_token in play_stream_url
 
-    stream_url = unquote(source_tag["src"])
+    stream_response = logged_in_client.get(play_stream_url, headers={"Range": "bytes=0-2"})
+    assert stream_response.status_code == 206
+    assert stream_response.data == b"ID3"
 
-    # Fetch the actual stream URL
-    stream_response = client.get(stream_url)
-    assert stream_token in stream_url
-    assert stream_response.status_code == 200
-    assert stream_response.data.startswith(b"ID3")
 
-
-def test_browse_stream_url_copy_button(client, app, media_file_slugs, stream_token) -> None:
+def test_browse_stream_url_copy_button(browse_page_soup, media_file_slugs, stream_token) -> None:
     """Ensure the Copy Stream URL button includes full valid stream URL."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
+    response, _ = browse_page_soup
 
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
-    buttons = soup.find_all("button", string=lambda text: text and "Copy URL" in text)
-    assert buttons, "No Copy URL button found"
-
-    button = buttons[0]
-    onclick = button.get("onclick")
-    assert onclick
-    assert "copyToClipboard(" in onclick
-
-    match = re.search(r"copyToClipboard\('([^']+)'", onclick)
-    assert match, "Stream URL not found in onclick"
+    # The copied URLs are all we need, so scan the raw page instead of walking the parse tree
+    copied_urls = [unquote(m.group(1)) for m in COPY_TO_CLIPBOARD_RE.finditer(response.text)]
+    assert copied_urls, "No Copy URL button found"
 
-    stream_url = unquote(match.group(1))
-    assert stream_url.startswith(
-        f"http://localhost/dl-token/testuser/{stream_token}/{slugified_filename}"
-    )
+    assert any(
+        url.startswith(f"http://localhost/dl-token/testuser/{stream_token}/{slugified_filename}")
+        for url in copied_urls
+    ), "Stream URL not found in any onclick"
 
 
-def test_footer_version_displayed_when_logged_in(client, app) -> None:
+def test_footer_version_displayed_when_logged_in(logged_in_client, version_info) -> None:
     """Ensure footer shows version info when user is logged in."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
+    response = logged_in_client.get("/browse/")
 
-    response = client.get("/", follow_redirects=True)
-    soup = BeautifulSoup(response.data, "html.parser")
+    # Plain substring checks on the raw footer markup suffice, no need to parse the page
+    footer_start = response.data.find(b"<footer")
+    assert footer_start != -1, "Footer not found"
+    footer = response.data[footer_start:]
+    assert b"home-stream" in footer
+    assert version_info.encode() in footer  # Version number appears
 
-    footer = soup.find("footer")
-    assert footer is not None, "Footer not found"
-    assert "home-stream" in footer.text
-    assert get_version_info() in footer.text  # Version number appears
 
-
-def test_footer_version_hidden_when_not_logged_in(client) -> None:
+def test_footer_version_hidden_when_not_logged_in(client, version_info) -> None:
     """Ensure footer does not show version info when user is not logged in."""
-    response = client.get("/", follow_redirects=True)
-    soup = BeautifulSoup(response.data, "html.parser")
+    response = client.get("/login")
 
-    footer = soup.find("footer")
-    assert footer is not None, "Footer not found"
-    assert "home-stream" in footer.text
-    assert get_version_info() not in footer.text  # Version number appears
+    footer_start = response.data.find(b"<footer")
+    assert footer_start != -1, "Footer not found"
+    footer = response.data[footer_start:]
+    assert b"home-stream" in footer
+    assert version_info.encode() not in footer  # Version number does not appear
 
 
-def test_browse_page_shows_breadcrumbs(client, app, media_file_slugs) -> None:
+def test_browse_page_shows_breadcrumbs(browse_page_soup) -> None:
     """Ensure /browse/<subfolder> displays correct breadcrumbs and headline."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-    response = client.get(f"/browse/{dirname(slugified_filename)}")
-
+    response, soup = browse_page_soup
     assert response.status_code == 200
-    soup = BeautifulSoup(response.data, "html.parser")
 
     breadcrumbs = soup.find("p", class_="breadcrumbs")
     assert breadcrumbs is not None
@@ -185,17 +165,10 @@ def test_browse_page_shows_breadcrumbs(client, app, media_file_slugs) -> None:
     assert "with spaces" in headline.text
 
 
-def test_play_page_shows_breadcrumbs(client, app, media_file_slugs) -> None:
+def test_play_page_shows_breadcrumbs(play_page_soup) -> None:
     """Ensure /play/<file> displays breadcrumbs."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    _, slugified_filename = media_file_slugs
-
-    response = client.get(f"/play/{slugified_filename}")
-
+    response, soup = play_page_soup
     assert response.status_code == 200
-    soup = BeautifulSoup(response.data, "html.parser")
 
     breadcrumbs = soup.find("p", class_="breadcrumbs")
     assert breadcrumbs is not None
@@ -204,52 +177,37 @@ def test_play_page_shows_breadcrumbs(client, app, media_file_slugs) -> None:
     assert "with spaces" in breadcrumbs.text
 
 
-def test_play_folder_renders_playlist_view(client, app, media_file_slugs) -> None:
+def test_play_folder_renders_playlist_view(logged_in_client, media_file_slugs) -> None:
     """Ensure /play/<folder> renders playlist player when path is a directory."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     # The fixture creates the file in /tmp/test/with spaces/
-    response = client.get("/play/test/with_spaces")
+    response = logged_in_client.get("/play/test/with_spaces")
     assert response.status_code == 200
 
-    soup = BeautifulSoup(response.data, "html.parser")
+    soup = BeautifulSoup(response.data, "lxml")
     assert soup.find("ul", {"id": "playlist"}) is not None
     assert soup.find(id="media-player") is not None
     assert "Now Playing" in soup.text
 
 
-def test_browse_page_playlist_url_present(client, app, stream_token, media_file_slugs) -> None:
+def test_browse_page_playlist_url_present(browse_page_soup, stream_token) -> None:
     """Ensure the download playlist button uses the .m3u8 stream URL."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
+    _, soup = browse_page_soup
 
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
-
-    assert soup.find_all("a", string=lambda t: "Download playlist" in t)
+    assert soup.select('a:-soup-contains("Download playlist")')
     assert any(
-        b["href"].startswith(f"http://localhost/dl-token/testuser/{stream_token}")
-        and "with_spaces" in b["href"]
-        for b in soup.find_all("a", href=True)
+        "with_spaces" in a["href"]
+        for a in soup.select(f'a[href^="http://localhost/dl-token/testuser/{stream_token}"]')
     )
 
 
 def test_browse_page_playlist_stream_url_button(
-    client, app, media_file_slugs, stream_token
+    browse_page_soup, media_file_slugs, stream_token
 ) -> None:
     """Ensure the playlist stream URL works when fetched."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_filename = media_file_slugs
+    _, soup = browse_page_soup
 
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
-
-    buttons = soup.find_all(
-        "button", string=lambda text: text and "Copy Stream URL for playlist" in text
-    )
+    buttons = soup.select("button:-soup-contains('Copy Stream URL for playlist')")
     assert buttons, "No Copy Stream URL for Playlist button found"
 
     button = buttons[0]
@@ -257,7 +215,7 @@ def test_browse_page_playlist_stream_url_button(
     assert onclick
     assert "copyToClipboard(" in onclick
 
-    match = re.search(r"copyToClipboard\('([^']+)'", onclick)
+    match = COPY_TO_CLIPBOARD_RE.search(onclick)
     assert match, "Stream URL not found in onclick"
 
     stream_url = unquote(match.group(1))
@@ -266,19 +224,16 @@ def test_browse_page_playlist_stream_url_button(
     )
 
 
-def test_play_folder_with_multiple_files(client, app, media_file_slugs, stream_token) -> None:
+def test_play_folder_with_multiple_files(logged_in_client, media_file_slugs, stream_token) -> None:
     """Ensure /play/<folder> renders a playlist with correct stream URLs."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
     _, slugified_path = media_file_slugs
     expected_url = f"http://localhost/dl-token/testuser/{stream_token}/{slugified_path}"
 
     # Access the folder-level play route
-    response = client.get("/play/test/with_spaces")
+    response = logged_in_client.get("/play/test/with_spaces")
     assert response.status_code == 200
 
-    soup = BeautifulSoup(response.data, "html.parser")
+    soup = BeautifulSoup(response.data, "lxml")
 
     # Check core playlist elements
     playlist = soup.find("ul", {"id": "playlist"})
@@ -307,7 +262,7 @@ def test_play_folder_with_multiple_files(client, app, media_file_slugs, stream_t
 # --- .nfo metadata rendering tests ---
 
 
-def test_browse_shows_nfo_title(client, app, media_file) -> None:
+def test_browse_shows_nfo_title(logged_in_client, media_file) -> None:
     """A sibling .nfo title is rendered as the primary line, filename demoted below."""
     # Create a video file (routes to the .nfo reader) in the same browsable folder.
     folder = dirname(media_file)
@@ -327,11 +282,8 @@ def test_browse_shows_nfo_title(client, app, media_file) -> None:
             "<plot>Some plot.</plot></episodedetails>"
         )
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
+    response = logged_in_client.get("/browse/test/with_spaces/")
+    soup = BeautifulSoup(response.data, "lxml")
     title = soup.find("span", class_="file-title")
     assert title is not None
     assert title.get_text(strip=True) == "Real Episode Title"
@@ -350,7 +302,7 @@ def test_browse_shows_nfo_title(client, app, media_file) -> None:
     assert plot.get_text(strip=True) == "Some plot."
 
 
-def test_browse_shows_tvshow_header(client, app, media_file) -> None:
+def test_browse_shows_tvshow_header(logged_in_client, media_file) -> None:
     """A tvshow.nfo in the folder renders a show metadata header."""
     folder = dirname(media_file)
     with open(f"{folder}/tvshow.nfo", "w", encoding="utf-8") as f:
@@ -360,11 +312,8 @@ def test_browse_shows_tvshow_header(client, app, media_file) -> None:
             "<rating>8.1</rating></tvshow>"
         )
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
+    response = logged_in_client.get("/browse/test/with_spaces/")
+    soup = BeautifulSoup(response.data, "lxml")
     header = soup.find("p", class_="show-meta")
     assert header is not None
     text = header.get_text()
@@ -373,33 +322,27 @@ def test_browse_shows_tvshow_header(client, app, media_file) -> None:
     assert "8.1" in text
 
 
-def test_browse_no_nfo_no_meta(client, app, media_file) -> None:
+def test_browse_no_nfo_no_meta(logged_in_client, media_file) -> None:
     """Without .nfo files, no metadata elements are rendered."""
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
+    response = logged_in_client.get("/browse/test/with_spaces/")
+    soup = BeautifulSoup(response.data, "lxml")
     assert soup.find("span", class_="file-title") is None
     assert soup.find("span", class_="file-name") is None
     assert soup.find("p", class_="show-meta") is None
 
 
-def test_browse_nfo_disabled(client, app, media_file) -> None:
+def test_browse_nfo_disabled(logged_in_client, app, media_file) -> None:
     """With the toggle off, .nfo metadata is not read or rendered."""
     app.config["SHOW_METADATA"] = False
     nfo_path = media_file.rsplit(".", 1)[0] + ".nfo"
     with open(nfo_path, "w", encoding="utf-8") as f:
         f.write("<episodedetails><title>Hidden</title></episodedetails>")
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
+    response = logged_in_client.get("/browse/test/with_spaces/")
     assert b"Hidden" not in response.data
 
 
-def test_browse_shows_audio_metadata(client, app, media_file) -> None:
+def test_browse_shows_audio_metadata(logged_in_client, media_file) -> None:
     """Audio: primary 'NN. title', secondary 'duration - artist - album - filename'."""
     from mutagen.easyid3 import EasyID3
 
@@ -414,11 +357,8 @@ def test_browse_shows_audio_metadata(client, app, media_file) -> None:
     tags["tracknumber"] = "11/12"
     tags.save(media_file)
 
-    with client.session_transaction() as sess:
-        login_session(sess, app)
-
-    response = client.get("/browse/test/with_spaces/")
-    soup = BeautifulSoup(response.data, "html.parser")
+    response = logged_in_client.get("/browse/test/with_spaces/")
+    soup = BeautifulSoup(response.data, "lxml")
 
     # Primary line: zero-padded track number + title
     title = soup.find("span", class_="file-title")
@@ -4,29 +4,13 @@
 
 """Tests for the Home Stream wsgi module."""
 
-import os
 import sys
 
-from tests.conftest import create_temp_config
 
-
-def test_wsgi_app_initializes(monkeypatch) -> None:
+def test_wsgi_app_initializes(monkeypatch, wsgi_config) -> None:
     """Smoke test: Ensure wsgi.py loads the app without errors."""
-    config = {
-        "users": {"testuser": "fake"},
-        "video_extensions": ["mp4"],
-        "audio_extensions": ["mp3"],
-        "media_root": "/tmp",
-        "secret_key": "testsecret",
-        "protocol": "http",
-    }
-
-    config_path = create_temp_config(config)
-    try:
-        monkeypatch.setattr(sys, "argv", ["wsgi.py", config_path])
-        import home_stream.wsgi as wsgi_module
+    monkeypatch.setattr(sys, "argv", ["wsgi.py", wsgi_config])
+    import home_stream.wsgi as wsgi_module
 
-        assert hasattr(wsgi_module, "app")
-        assert wsgi_module.app is not None
-    finally:
-        os.remove(config_path)
+    assert hasattr(wsgi_module, "app")
+    assert wsgi_module.app is not None